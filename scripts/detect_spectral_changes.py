@@ -22,17 +22,21 @@ Usage:
 
 Requirements:
     pip install numpy scipy pandas matplotlib --break-system-packages
+    pip install numba --break-system-packages  # optional, JIT-compiled kernels
 """
 
+import re
 import sys
 import argparse
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 import numpy as np
 from typing import List, Dict, Tuple, Optional
 
 try:
-    from scipy.signal import find_peaks, argrelextrema
-    from scipy.ndimage import gaussian_filter1d
+    from scipy.signal import find_peaks
 except ImportError:
     print("Error: scipy not available. Install with: pip install scipy --break-system-packages")
     sys.exit(1)
@@ -49,16 +53,119 @@ except ImportError:
     print("Warning: matplotlib not available. Install with: pip install matplotlib --break-system-packages")
     plt = None
 
+# Optional: numba JIT-compiles the numeric kernels below (pure Python otherwise)
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Gaussian smoothing kernel for sigma=1.0, truncated at 4 sigma
+# (the same 9 taps scipy.ndimage.gaussian_filter1d would build on every call)
+_GAUSS_S1 = np.exp(-0.5 * np.arange(-4, 5, dtype=np.float64) ** 2)
+_GAUSS_S1 /= _GAUSS_S1.sum()
+
+# Marker band file patterns (see parse_marker_bands)
+_PHASE_RE = re.compile(r'(\w+):\s*\[([\d,\s\(\)\–\-\w\.]+)\]')
+_ANNOT_RE = re.compile(r'\([^)]+\)')
+# A band number, or a range like "1025-1029" / "468–470" (group 1 = lower bound)
+_MARKER_RE = re.compile(r'(\d+(?:\.\d+)?)(?:\s*[–\-]\s*\d+(?:\.\d+)?)?')
+# Temperature in a file name: "248.15K" or "248K", else any 3-digit number
+_FNAME_TEMP_RE = re.compile(r'(\d{2,3}(?:\.\d{1,2})?)\s*K')
+_FNAME_NUM_RE = re.compile(r'(\d{3})')
+
 
 class RamanSpectrum:
-    """Represents a single Raman spectrum at a given temperature."""
+    """
+    Represents a single Raman spectrum at a given temperature.
     
-    def __init__(self, wavenumber: np.ndarray, intensity: np.ndarray, temperature: float):
+    Wavenumber and intensity are stored as float32 by default (normalized
+    Raman intensities carry ~3 significant figures), halving memory traffic
+    in peak detection and comparison. Pass dtype=np.float64 to keep double
+    precision, or dtype=None to keep the dtype of the input. Derived arrays
+    (normalized intensity, peak lists) follow the stored dtype.
+    """
+    
+    def __init__(self, wavenumber: np.ndarray, intensity: np.ndarray, temperature: float,
+                 dtype: Optional[type] = np.float32):
+        wavenumber = np.asarray(wavenumber)
+        intensity = np.asarray(intensity)
+        if dtype is not None:
+            wavenumber = wavenumber.astype(dtype, copy=False)
+            intensity = intensity.astype(dtype, copy=False)
         self.wavenumber = wavenumber
         self.intensity = intensity
         self.temperature = temperature
-        self.peaks = None
         self.peak_properties = None
+        self._peaks = None
+        self._is_shoulder = None
+        self._clear_peak_caches()
+    
+    def _clear_peak_caches(self):
+        """Drop everything derived from peaks, is_shoulder or intensity."""
+        self.peak_wavenumbers = None
+        self._peak_list_cache = None
+        # Feature counts (see n_peaks, n_shoulders), filled in by detect_peaks
+        self._n_peaks = None
+        self._n_shoulders = None
+    
+    @property
+    def peaks(self) -> Optional[np.ndarray]:
+        """Indices of the detected peaks (main peaks and shoulders), or None."""
+        return self._peaks
+    
+    @peaks.setter
+    def peaks(self, value: Optional[np.ndarray]):
+        # Peaks set by hand replace those of detect_peaks; cached lists are stale
+        self._peaks = value
+        self._clear_peak_caches()
+    
+    @property
+    def is_shoulder(self) -> Optional[np.ndarray]:
+        """Boolean mask over peaks marking shoulders, or None."""
+        return self._is_shoulder
+    
+    @is_shoulder.setter
+    def is_shoulder(self, value: Optional[np.ndarray]):
+        self._is_shoulder = value
+        self._clear_peak_caches()
+    
+    @property
+    def n_peaks(self) -> int:
+        """Number of peaks including shoulders (0 before peak detection)."""
+        if self._n_peaks is None:
+            self._n_peaks = len(self.peaks) if self.peaks is not None else 0
+        return self._n_peaks
+    
+    @property
+    def n_shoulders(self) -> int:
+        """Number of peaks flagged as shoulders."""
+        if self._n_shoulders is None:
+            self._n_shoulders = int(np.sum(self.is_shoulder)) if self.is_shoulder is not None else 0
+        return self._n_shoulders
+    
+    @property
+    def intensity(self) -> np.ndarray:
+        """Measured intensity."""
+        return self._intensity
+    
+    @intensity.setter
+    def intensity(self, value: np.ndarray):
+        self._intensity = np.asarray(value)
+        self._norm = None
+        self._peak_list_cache = None
+    
+    @property
+    def norm_intensity(self) -> np.ndarray:
+        """
+        Intensity normalized to the spectrum maximum.
+        
+        Needed by peak detection, peak lists and plots, so it is computed on
+        first use (single multiply pass) and cached until intensity is
+        reassigned.
+        """
+        if self._norm is None:
+            self._norm = np.multiply(self._intensity, 1.0 / float(self._intensity.max()))
+        return self._norm
     
     def detect_peaks(self, prominence: float = 0.005, width: int = 2, 
                      height: float = 0.005, distance: int = 3, detect_shoulders: bool = True):
@@ -80,11 +187,8 @@ class RamanSpectrum:
         detect_shoulders : bool
             If True, attempt to detect shoulder peaks. Default: True
         """
-        # Normalize intensity
-        norm_intensity = self.intensity / np.max(self.intensity)
-        
-        # Smooth the spectrum slightly to reduce noise
-        smoothed = gaussian_filter1d(norm_intensity, sigma=1.0)
+        # Smooth the normalized spectrum slightly to reduce noise
+        smoothed = _smooth_sigma1(self.norm_intensity)
         
         # Find peaks
         peaks, properties = find_peaks(
@@ -102,26 +206,28 @@ class RamanSpectrum:
         if detect_shoulders:
             shoulders = self._detect_shoulders(smoothed, peaks, properties)
             if len(shoulders) > 0:
-                # Combine peaks and shoulders
-                all_peaks = np.concatenate([peaks, shoulders])
-                # Sort by position
-                sort_idx = np.argsort(all_peaks)
-                self.peaks = all_peaks[sort_idx]
-                
-                # Mark which are shoulders
+                # Merge the sorted shoulders into the sorted main peaks;
+                # the k-th shoulder lands at its insertion point + k
+                shoulders = np.sort(shoulders)
+                insert_at = np.searchsorted(peaks, shoulders)
+                self.peaks = np.insert(peaks, insert_at, shoulders)
                 self.is_shoulder = np.zeros(len(self.peaks), dtype=bool)
-                shoulder_mask = np.isin(self.peaks, shoulders)
-                self.is_shoulder = shoulder_mask[sort_idx]
+                self.is_shoulder[insert_at + np.arange(len(shoulders))] = True
             else:
                 self.is_shoulder = np.zeros(len(peaks), dtype=bool)
         else:
             self.is_shoulder = np.zeros(len(peaks), dtype=bool)
         
-        # Get peak positions in wavenumbers
-        peak_wavenumbers = self.wavenumber[self.peaks]
+        # Get peak positions in wavenumbers (ascending for an ascending axis,
+        # since peak indices are sorted); peak lists and spectrum comparison
+        # match against this array
+        self.peak_wavenumbers = self.wavenumber[self.peaks]
         peak_intensities = self.intensity[self.peaks]
         
-        return peak_wavenumbers, peak_intensities
+        self._n_peaks = int(self.peaks.size)
+        self._n_shoulders = int(self.is_shoulder.sum())
+        
+        return self.peak_wavenumbers, peak_intensities
     
     def _detect_shoulders(self, smoothed: np.ndarray, peaks: np.ndarray, 
                          properties: dict, shoulder_ratio: float = 0.3) -> np.ndarray:
@@ -148,73 +254,195 @@ class RamanSpectrum:
         --------
         np.ndarray : Indices of detected shoulders
         """
-        from scipy.signal import argrelextrema
+        # Find all local maxima (less strict than main peaks), in ascending order
+        local_maxima = _local_maxima_order2(smoothed)
         
-        # Find all local maxima (less strict than main peaks)
-        local_maxima = argrelextrema(smoothed, np.greater, order=2)[0]
+        # Search window per main peak: within 3x the peak width
+        if 'widths' in properties:
+            search_ranges = (properties['widths'] * 3).astype(int)
+        else:
+            search_ranges = np.full(len(peaks), 20, dtype=int)  # Default search range
         
-        shoulders = []
+        if njit is not None:
+            return _shoulder_scan(smoothed, peaks, local_maxima, search_ranges, shoulder_ratio)
         
-        for peak in peaks:
-            peak_height = smoothed[peak]
-            
-            # Look for local maxima near this peak
-            # Define "near" as within the peak's width
-            if 'widths' in properties:
-                # Get the width of this peak
-                peak_idx = np.where(peaks == peak)[0][0]
-                width = properties['widths'][peak_idx]
-                search_range = int(width * 3)  # Search within 3x the peak width
-            else:
-                search_range = 20  # Default search range
-            
-            # Find local maxima in the search range
-            nearby_maxima = local_maxima[
-                (local_maxima > peak - search_range) & 
-                (local_maxima < peak + search_range) &
-                (local_maxima != peak)  # Exclude the main peak itself
-            ]
-            
-            for candidate in nearby_maxima:
-                candidate_height = smoothed[candidate]
-                
-                # Check if it's a shoulder (20-50% of main peak height)
-                if 0.2 * peak_height < candidate_height < shoulder_ratio * peak_height:
-                    # Make sure it's not already detected as a main peak
-                    if candidate not in peaks and candidate not in shoulders:
-                        shoulders.append(candidate)
+        # Vectorized fallback without numba:
+        # slice of local maxima strictly inside (peak - range, peak + range)
+        lo = np.searchsorted(local_maxima, peaks - search_ranges, side='right')
+        hi = np.searchsorted(local_maxima, peaks + search_ranges, side='left')
+        counts = np.maximum(hi - lo, 0)
+        
+        # Flatten all (parent peak, candidate) pairs into one array each
+        parents = np.repeat(peaks, counts)
+        offsets = np.repeat(lo - np.cumsum(counts) + counts, counts)
+        candidates = local_maxima[np.arange(counts.sum()) + offsets]
+        
+        candidate_heights = smoothed[candidates]
+        peak_heights = smoothed[parents]
+        
+        # Shoulder: 20% to shoulder_ratio of the main peak height, not a main peak itself
+        is_shoulder = ((candidate_heights > 0.2 * peak_heights) &
+                       (candidate_heights < shoulder_ratio * peak_heights) &
+                       (candidates != parents) &
+                       ~np.isin(candidates, peaks))
         
-        return np.array(shoulders, dtype=int)
+        return np.unique(candidates[is_shoulder]).astype(int)
     
-    def get_peak_list(self) -> List[Dict]:
-        """Return list of detected peaks with properties."""
+    def get_peak_list(self) -> Dict[str, np.ndarray]:
+        """
+        Return detected peaks with properties as parallel arrays.
+        
+        Keys: 'wavenumber', 'intensity', 'relative_intensity', 'is_shoulder',
+        'prominence' and 'width'. Prominence and width are only known for
+        main peaks and are NaN for shoulders. The result is cached until
+        detect_peaks is run again or peaks, is_shoulder or intensity are
+        reassigned.
+        """
+        if self._peak_list_cache is not None:
+            return self._peak_list_cache
+        
         if self.peaks is None:
             self.detect_peaks()
         
-        peak_list = []
-        for i, peak_idx in enumerate(self.peaks):
-            peak_info = {
-                'wavenumber': self.wavenumber[peak_idx],
-                'intensity': self.intensity[peak_idx],
-                'relative_intensity': self.intensity[peak_idx] / np.max(self.intensity),
-                'is_shoulder': self.is_shoulder[i] if hasattr(self, 'is_shoulder') else False
-            }
-            
-            # Add prominence and width for main peaks
-            if hasattr(self, 'peak_properties') and not peak_info['is_shoulder']:
-                # Find the index in the original peak_properties
-                # (shoulders are added after, so they won't be in properties)
-                main_peak_idx = i - np.sum(self.is_shoulder[:i])
-                if main_peak_idx < len(self.peak_properties['prominences']):
-                    peak_info['prominence'] = self.peak_properties['prominences'][main_peak_idx]
-                    peak_info['width'] = self.peak_properties['widths'][main_peak_idx]
-            
-            peak_list.append(peak_info)
+        num_peaks = len(self.peaks)
+        if self.is_shoulder is not None:
+            is_shoulder = np.asarray(self.is_shoulder, dtype=bool)
+        else:
+            is_shoulder = np.zeros(num_peaks, dtype=bool)
+        
+        prominence = np.full(num_peaks, np.nan)
+        width = np.full(num_peaks, np.nan)
+        if self.peak_properties is not None:
+            # Main peaks keep the order of the original find_peaks properties
+            # (shoulders are added after, so they won't be in properties)
+            main_idx = np.flatnonzero(~is_shoulder)[:len(self.peak_properties['prominences'])]
+            prominence[main_idx] = self.peak_properties['prominences'][:len(main_idx)]
+            width[main_idx] = self.peak_properties['widths'][:len(main_idx)]
+        
+        # Reuse the sorted positions stored by detect_peaks; peaks set by hand
+        # have none
+        if self.peak_wavenumbers is not None:
+            peak_wavenumbers = self.peak_wavenumbers
+        else:
+            peak_wavenumbers = self.wavenumber[self.peaks]
         
-        return peak_list
+        self._peak_list_cache = {
+            'wavenumber': peak_wavenumbers,
+            'intensity': self.intensity[self.peaks],
+            'relative_intensity': self.norm_intensity[self.peaks],
+            'is_shoulder': is_shoulder,
+            'prominence': prominence,
+            'width': width,
+        }
+        return self._peak_list_cache
+
+
+def _smooth_sigma1(values: np.ndarray) -> np.ndarray:
+    """
+    Gaussian smoothing with sigma=1.0 using the precomputed _GAUSS_S1 kernel.
+    
+    Equivalent to gaussian_filter1d(values, sigma=1.0): the edges are
+    mirrored like scipy's default mode='reflect' and the input dtype is kept.
+    """
+    padded = np.pad(values, len(_GAUSS_S1) // 2, mode='symmetric')
+    return np.convolve(padded, _GAUSS_S1.astype(values.dtype, copy=False), mode='valid')
+
+
+def _local_maxima_order2(values: np.ndarray) -> np.ndarray:
+    """
+    Indices of points strictly greater than their two neighbours on each side.
+    
+    Same result as argrelextrema(values, np.greater, order=2)[0], but in one
+    fused pass of four shifted comparisons instead of rolled copies.
+    """
+    if values.size == 0:
+        return np.zeros(0, dtype=np.intp)
+    
+    # Edge padding reproduces argrelextrema's default mode='clip'
+    padded = np.pad(values, 2, mode='edge')
+    center = padded[2:-2]
+    is_max = ((center > padded[:-4]) & (center > padded[1:-3]) &
+              (center > padded[3:-1]) & (center > padded[4:]))
+    return np.flatnonzero(is_max)
+
+
+def _shoulder_scan(smoothed: np.ndarray, peaks: np.ndarray, local_maxima: np.ndarray,
+                   search_ranges: np.ndarray, shoulder_ratio: float) -> np.ndarray:
+    """
+    Shoulder search kernel used by RamanSpectrum._detect_shoulders (numba only).
+    
+    peaks and local_maxima must be sorted. Returns the sorted, unique local
+    maxima that qualify as a shoulder of at least one main peak.
+    """
+    flagged = np.zeros(local_maxima.shape[0], dtype=np.bool_)
+    for pi in range(peaks.shape[0]):
+        peak = peaks[pi]
+        peak_height = smoothed[peak]
+        # Walk the local maxima strictly inside (peak - range, peak + range)
+        k = np.searchsorted(local_maxima, peak - search_ranges[pi], side='right')
+        while k < local_maxima.shape[0] and local_maxima[k] < peak + search_ranges[pi]:
+            candidate = local_maxima[k]
+            candidate_height = smoothed[candidate]
+            if (candidate != peak and
+                    0.2 * peak_height < candidate_height < shoulder_ratio * peak_height):
+                # Make sure it's not already detected as a main peak
+                m = np.searchsorted(peaks, candidate)
+                if m >= peaks.shape[0] or peaks[m] != candidate:
+                    flagged[k] = True
+            k += 1
+    return local_maxima[flagged]
+
+
+if njit is not None:
+    _shoulder_scan = njit(cache=True)(_shoulder_scan)
+
+
+def _read_spectrum_data(filepath: Path, dtype: type = np.float64) -> np.ndarray:
+    """
+    Read the numeric columns of a spectrum file into a 2-D array.
+    
+    Binary .npy sidecars are memory-mapped in their stored dtype. Text files
+    are parsed directly into dtype by the pandas C parser (whitespace first,
+    then comma separated), and by np.loadtxt when pandas is not installed
+    or rejects the file. Both keep the row structure: rows with missing or
+    extra fields are an error.
+    """
+    if filepath.suffix == '.npy':
+        return np.load(filepath, mmap_mode='r')
+    
+    # (pandas separator, np.loadtxt delimiter); whitespace also covers tabs
+    for sep, delimiter in ((r'\s+', None), (',', ',')):
+        if pd is not None:
+            # na_filter=False: a missing field is an error instead of NaN
+            try:
+                return pd.read_csv(filepath, sep=sep, header=None, comment='#',
+                                   dtype=dtype, engine='c', na_filter=False).to_numpy()
+            except ValueError:
+                pass
+        # np.loadtxt also accepts literal "nan" values, which pandas rejects here
+        try:
+            return np.loadtxt(filepath, delimiter=delimiter, ndmin=2, dtype=dtype)
+        except ValueError:
+            continue
+    
+    raise ValueError(f"Cannot load data from {filepath}. Check file format.")
+
 
+@functools.lru_cache(maxsize=1024)
+def _temperature_from_filename(filename: str) -> Optional[float]:
+    """Temperature encoded in a file name (e.g., "spectrum_248K.txt"), or None."""
+    # Look for patterns like "248.15K" or "248K"
+    temp_match = _FNAME_TEMP_RE.search(filename)
+    if temp_match is None:
+        # Try just a number
+        temp_match = _FNAME_NUM_RE.search(filename)
+    if temp_match is None:
+        return None
+    return float(temp_match.group(1))
 
-def load_txt_spectrum(filepath: Path, temperature: Optional[float] = None) -> RamanSpectrum:
+
+def load_txt_spectrum(filepath: Path, temperature: Optional[float] = None,
+                      dtype: type = np.float32) -> RamanSpectrum:
     """
     Load a Raman spectrum from a txt file.
     
@@ -223,73 +451,337 @@ def load_txt_spectrum(filepath: Path, temperature: Optional[float] = None) -> Ra
     - Space, tab, or comma separated
     - Optional header lines (will be skipped automatically)
     
+    A binary NumPy sidecar with the same (N, 2) layout and the temperature in
+    its name (e.g., "spectrum_248K.npy", written with np.save) is also accepted
+    and memory-mapped instead of parsed.
+    
+    Data are stored as float32 by default, which is ample for normalized
+    Raman intensities and halves memory traffic; pass dtype=np.float64 for
+    data that needs the extra precision.
+    
     Temperature can be:
     - Provided as parameter
     - Extracted from filename (e.g., "spectrum_248.15K.txt" or "spectrum_248K.txt")
     """
     # Try to extract temperature from filename if not provided
     if temperature is None:
-        import re
         filename = filepath.name
-        # Look for patterns like "248.15K" or "248K"
-        temp_match = re.search(r'(\d{2,3}(?:\.\d{1,2})?)\s*K', filename)
-        if temp_match:
-            temperature = float(temp_match.group(1))
-        else:
-            # Try just a number
-            temp_match = re.search(r'(\d{3})', filename)
-            if temp_match:
-                temperature = float(temp_match.group(1))
-            else:
-                raise ValueError(f"Cannot extract temperature from filename: {filename}. Please provide temperature explicitly.")
+        temperature = _temperature_from_filename(filename)
+        if temperature is None:
+            raise ValueError(f"Cannot extract temperature from filename: {filename}. Please provide temperature explicitly.")
     
-    # Load data - try different delimiters
-    try:
-        data = np.loadtxt(filepath, delimiter=None)  # Auto-detect whitespace
-    except:
-        try:
-            data = np.loadtxt(filepath, delimiter=',')
-        except:
-            try:
-                data = np.loadtxt(filepath, delimiter='\t')
-            except:
-                raise ValueError(f"Cannot load data from {filepath}. Check file format.")
+    data = _read_spectrum_data(filepath, dtype)
     
-    if data.shape[1] != 2:
-        raise ValueError(f"Expected 2 columns (wavenumber, intensity), got {data.shape[1]}")
+    if data.ndim != 2 or data.shape[1] != 2:
+        raise ValueError(f"Expected 2 columns (wavenumber, intensity), got array of shape {data.shape}")
     
-    wavenumber = data[:, 0]
-    intensity = data[:, 1]
+    return RamanSpectrum(data[:, 0], data[:, 1], temperature, dtype=dtype)
+
+
+def _match_sorted(a: np.ndarray, b: np.ndarray, tol: float) -> np.ndarray:
+    """
+    Two-pointer nearest-neighbour match of sorted array a against sorted array b.
     
-    return RamanSpectrum(wavenumber, intensity, temperature)
+    Returns, for every element of a, the index of the closest element of b
+    within tol (the lower one on ties), or -1 if there is none.
+    """
+    matches = np.full(a.shape[0], -1, dtype=np.int64)
+    j = 0
+    for i in range(a.shape[0]):
+        x = a[i]
+        # Advance to the first element of b that is >= x
+        while j < b.shape[0] and b[j] < x:
+            j += 1
+        best = -1
+        best_dist = tol
+        if j > 0 and x - b[j - 1] <= best_dist:
+            best = j - 1
+            best_dist = x - b[j - 1]
+        if j < b.shape[0] and b[j] - x <= tol and (best < 0 or b[j] - x < best_dist):
+            best = j
+        matches[i] = best
+    return matches
+
+
+if njit is not None:
+    _match_sorted = njit(cache=True, nogil=True)(_match_sorted)
 
 
-def match_peak(target_wn: float, peak_list: List[Dict], tolerance: float = 5.0) -> Optional[Dict]:
+def _is_ascending(values: np.ndarray) -> bool:
+    """True if values are sorted in ascending order."""
+    return bool(np.all(values[1:] >= values[:-1]))
+
+
+def _match_peak_positions(a: np.ndarray, b: np.ndarray, tolerance: float) -> np.ndarray:
     """
-    Find a peak in peak_list that matches target wavenumber within tolerance.
+    Match peak wavenumbers a against b; see _match_sorted.
     
-    Returns the closest matching peak or None if no match found.
+    Peak wavenumbers are already ascending for the usual ascending axis (peak
+    indices are sorted), so they are passed straight to the kernel; only
+    spectra recorded with a descending axis are sorted first.
     """
-    matches = [p for p in peak_list if abs(p['wavenumber'] - target_wn) <= tolerance]
+    if _is_ascending(a) and _is_ascending(b):
+        return _match_sorted(a, b, float(tolerance))
     
-    if not matches:
-        return None
+    order_a = np.argsort(a, kind='stable')
+    order_b = np.argsort(b, kind='stable')
+    sorted_matches = _match_sorted(a[order_a], b[order_b], float(tolerance))
     
-    # Return closest match
-    return min(matches, key=lambda p: abs(p['wavenumber'] - target_wn))
+    matches = np.full(len(a), -1, dtype=np.int64)
+    found = sorted_matches >= 0
+    matches[order_a[found]] = order_b[sorted_matches[found]]
+    return matches
 
 
-def compare_spectra(spectra: List[RamanSpectrum], tolerance: float = 5.0) -> Dict:
+def _match_peaks(prev_wn: np.ndarray, curr_wn: np.ndarray, prev_rel: np.ndarray,
+                 curr_rel: np.ndarray, tol: float):
     """
-    Compare multiple spectra to detect changes across temperatures.
+    Match the peaks of two consecutive spectra and sort them into change categories.
     
-    Note: Assumes peaks have already been detected in all spectra.
+    Both wavenumber arrays must be ascending. Returns index arrays
+    (appearing, disappearing, prev_to_curr, changed, shifting): appearing
+    indexes curr; disappearing, changed (>30% intensity change) and shifting
+    (>2 cm⁻¹) index prev; prev_to_curr maps each prev peak to its match in
+    curr (-1 = none).
+    """
+    curr_to_prev = _match_sorted(curr_wn, prev_wn, tol)
+    prev_to_curr = _match_sorted(prev_wn, curr_wn, tol)
     
-    Returns a dictionary with detected changes categorized by type.
+    appearing = np.empty(curr_wn.shape[0], dtype=np.int64)
+    n_appearing = 0
+    for j in range(curr_wn.shape[0]):
+        if curr_to_prev[j] < 0:
+            appearing[n_appearing] = j
+            n_appearing += 1
+    
+    disappearing = np.empty(prev_wn.shape[0], dtype=np.int64)
+    changed = np.empty(prev_wn.shape[0], dtype=np.int64)
+    shifting = np.empty(prev_wn.shape[0], dtype=np.int64)
+    n_disappearing = n_changed = n_shifting = 0
+    for i in range(prev_wn.shape[0]):
+        j = prev_to_curr[i]
+        if j < 0:
+            disappearing[n_disappearing] = i
+            n_disappearing += 1
+            continue
+        intensity_change = (curr_rel[j] - prev_rel[i]) / prev_rel[i]
+        if intensity_change > 0.3 or intensity_change < -0.3:
+            changed[n_changed] = i
+            n_changed += 1
+        if abs(curr_wn[j] - prev_wn[i]) > 2.0:
+            shifting[n_shifting] = i
+            n_shifting += 1
+    
+    return (appearing[:n_appearing], disappearing[:n_disappearing], prev_to_curr,
+            changed[:n_changed], shifting[:n_shifting])
+
+
+if njit is not None:
+    # error_model='numpy': a zero prev intensity gives inf/nan like the NumPy
+    # fallback instead of raising ZeroDivisionError
+    _match_peaks = njit(cache=True, nogil=True, error_model='numpy')(_match_peaks)
+
+
+def _peak_changes(prev_wn: np.ndarray, curr_wn: np.ndarray, prev_rel: np.ndarray,
+                  curr_rel: np.ndarray, tolerance: float):
     """
-    # Sort spectra by temperature
-    spectra = sorted(spectra, key=lambda s: s.temperature)
+    Index arrays of changed peaks between two spectra; see _match_peaks.
+    
+    Uses the compiled kernel when numba is installed and both axes are
+    ascending. Otherwise peaks are matched with _match_peak_positions (an
+    interpreted Python loop when numba is missing) and classified with
+    vectorized NumPy.
+    """
+    if njit is not None and _is_ascending(prev_wn) and _is_ascending(curr_wn):
+        return _match_peaks(prev_wn, curr_wn, prev_rel, curr_rel, float(tolerance))
+    
+    # Closest match for every peak in the other spectrum (-1 = no match)
+    curr_to_prev = _match_peak_positions(curr_wn, prev_wn, tolerance)
+    prev_to_curr = _match_peak_positions(prev_wn, curr_wn, tolerance)
+    
+    matched = np.flatnonzero(prev_to_curr >= 0)
+    partners = prev_to_curr[matched]
+    intensity_change = (curr_rel[partners] - prev_rel[matched]) / prev_rel[matched]
+    position_shift = curr_wn[partners] - prev_wn[matched]
     
+    return (np.flatnonzero(curr_to_prev < 0),
+            np.flatnonzero(prev_to_curr < 0),
+            prev_to_curr,
+            matched[(intensity_change > 0.3) | (intensity_change < -0.3)],
+            matched[np.abs(position_shift) > 2.0])
+
+
+def _match_batch(peak_wn: np.ndarray, peak_rel: np.ndarray, peak_offsets: np.ndarray, tol: float):
+    """
+    Run _match_peaks on every pair of consecutive spectra of a CSR peak batch.
+    
+    Each spectrum's peak wavenumbers must be ascending. Returns the same five
+    arrays as _match_peaks, with indices into the flat peak arrays: appearing
+    peaks belong to the later spectrum of their pair, the others to the
+    earlier one. Within each array, indices are ascending (pair by pair).
+    """
+    n_total = peak_wn.shape[0]
+    appearing = np.empty(n_total, dtype=np.int64)
+    disappearing = np.empty(n_total, dtype=np.int64)
+    changed = np.empty(n_total, dtype=np.int64)
+    shifting = np.empty(n_total, dtype=np.int64)
+    prev_to_curr = np.full(n_total, -1, dtype=np.int64)
+    n_appearing = n_disappearing = n_changed = n_shifting = 0
+    
+    for k in range(1, peak_offsets.shape[0] - 1):
+        a0, a1 = peak_offsets[k - 1], peak_offsets[k]
+        b0, b1 = peak_offsets[k], peak_offsets[k + 1]
+        app, dis, p2c, ch, sh = _match_peaks(peak_wn[a0:a1], peak_wn[b0:b1],
+                                             peak_rel[a0:a1], peak_rel[b0:b1], tol)
+        for j in app:
+            appearing[n_appearing] = b0 + j
+            n_appearing += 1
+        for i in dis:
+            disappearing[n_disappearing] = a0 + i
+            n_disappearing += 1
+        for i in ch:
+            changed[n_changed] = a0 + i
+            n_changed += 1
+        for i in sh:
+            shifting[n_shifting] = a0 + i
+            n_shifting += 1
+        for i in range(p2c.shape[0]):
+            if p2c[i] >= 0:
+                prev_to_curr[a0 + i] = b0 + p2c[i]
+    
+    return (appearing[:n_appearing], disappearing[:n_disappearing], prev_to_curr,
+            changed[:n_changed], shifting[:n_shifting])
+
+
+if njit is not None:
+    _match_batch = njit(cache=True, nogil=True, error_model='numpy')(_match_batch)
+
+
+class SpectrumBatch:
+    """
+    Several spectra stored as flat arrays (structure of arrays), in temperature order.
+    
+    Peaks are ragged and stored in CSR form: the peaks of spectrum k are
+    peak_offsets[k]:peak_offsets[k + 1] of peak_wavenumbers, peak_intensities
+    (relative) and peak_is_shoulder. The full spectra are available padded
+    with NaN to a common length as the 2-D arrays wavenumbers and intensities
+    (n_spectra x max points; n_points holds the true lengths), built on
+    first access since the comparison only needs the peaks.
+    """
+    
+    def __init__(self, spectra: List[RamanSpectrum], temperatures: np.ndarray,
+                 peak_wavenumbers: np.ndarray, peak_intensities: np.ndarray,
+                 peak_is_shoulder: np.ndarray, peak_offsets: np.ndarray):
+        self.spectra = spectra
+        self.temperatures = temperatures
+        self.peak_wavenumbers = peak_wavenumbers
+        self.peak_intensities = peak_intensities
+        self.peak_is_shoulder = peak_is_shoulder
+        self.peak_offsets = peak_offsets
+    
+    @classmethod
+    def from_spectra(cls, spectra: List[RamanSpectrum]) -> 'SpectrumBatch':
+        """
+        Pack spectra (sorted by temperature) and their peak lists into one batch.
+        
+        Peaks are detected with default settings for spectra that have none.
+        """
+        spectra = sorted(spectra, key=lambda s: s.temperature)
+        peak_lists = [spectrum.get_peak_list() for spectrum in spectra]
+        
+        peak_offsets = np.zeros(len(spectra) + 1, dtype=np.int64)
+        np.cumsum([len(peaks['wavenumber']) for peaks in peak_lists], out=peak_offsets[1:])
+        
+        def flat(key, dtype=None):
+            if not peak_lists:
+                return np.empty(0, dtype=dtype or np.float64)
+            return np.concatenate([peaks[key] for peaks in peak_lists])
+        
+        return cls(
+            spectra=spectra,
+            temperatures=np.array([spectrum.temperature for spectrum in spectra], dtype=np.float64),
+            peak_wavenumbers=flat('wavenumber'),
+            peak_intensities=flat('relative_intensity'),
+            peak_is_shoulder=flat('is_shoulder', bool),
+            peak_offsets=peak_offsets,
+        )
+    
+    def __len__(self) -> int:
+        return len(self.temperatures)
+    
+    def peak_slice(self, k: int) -> slice:
+        """Slice of the flat peak arrays belonging to spectrum k."""
+        return slice(self.peak_offsets[k], self.peak_offsets[k + 1])
+    
+    @functools.cached_property
+    def n_points(self) -> np.ndarray:
+        """Number of data points of each spectrum."""
+        return np.array([len(spectrum.wavenumber) for spectrum in self.spectra], dtype=np.int64)
+    
+    def _padded(self, attribute: str) -> np.ndarray:
+        """Stack one array attribute of all spectra, NaN-padded to a common length."""
+        arrays = [getattr(spectrum, attribute) for spectrum in self.spectra]
+        padded = np.full((len(arrays), int(self.n_points.max(initial=0))), np.nan,
+                         dtype=np.result_type(*arrays, np.float32))
+        for k, values in enumerate(arrays):
+            padded[k, :len(values)] = values
+        return padded
+    
+    @functools.cached_property
+    def wavenumbers(self) -> np.ndarray:
+        """Wavenumber axes, n_spectra x max points, NaN-padded."""
+        return self._padded('wavenumber')
+    
+    @functools.cached_property
+    def intensities(self) -> np.ndarray:
+        """Intensities, n_spectra x max points, NaN-padded."""
+        return self._padded('intensity')
+
+
+def _batch_peak_changes(batch: SpectrumBatch, tolerance: float):
+    """
+    Changed peaks between all consecutive spectra of a batch; see _match_batch.
+    
+    With numba and ascending peak positions this is a single compiled call
+    for the whole batch; otherwise the pairs are compared one by one.
+    """
+    wn = batch.peak_wavenumbers
+    rel = batch.peak_intensities
+    offsets = batch.peak_offsets
+    
+    if njit is not None:
+        # Ascending within each spectrum (steps across spectrum boundaries don't count)
+        ascending = wn[1:] >= wn[:-1]
+        ascending[offsets[1:-1][(offsets[1:-1] > 0) & (offsets[1:-1] < len(wn))] - 1] = True
+        if ascending.all():
+            return _match_batch(wn, rel, offsets, float(tolerance))
+    
+    results = ([], [], np.full(len(wn), -1, dtype=np.int64), [], [])
+    for k in range(1, len(batch)):
+        a0, b0 = offsets[k - 1], offsets[k]
+        prev, curr = batch.peak_slice(k - 1), batch.peak_slice(k)
+        appearing, disappearing, prev_to_curr, changed, shifting = _peak_changes(
+            wn[prev], wn[curr], rel[prev], rel[curr], tolerance)
+        results[0].append(b0 + appearing)
+        results[1].append(a0 + disappearing)
+        matched = prev_to_curr >= 0
+        results[2][a0 + np.flatnonzero(matched)] = b0 + prev_to_curr[matched]
+        results[3].append(a0 + changed)
+        results[4].append(a0 + shifting)
+    
+    def join(parts):
+        return np.concatenate(parts).astype(np.int64) if parts else np.empty(0, dtype=np.int64)
+    
+    return (join(results[0]), join(results[1]), results[2], join(results[3]), join(results[4]))
+
+
+def compare_batch(batch: SpectrumBatch, tolerance: float = 5.0) -> Dict:
+    """
+    Compare consecutive spectra of a batch to detect changes across temperatures.
+    
+    Returns a dictionary with detected changes categorized by type; see
+    compare_spectra.
+    """
     changes = {
         'appearing': [],  # New peaks appearing
         'disappearing': [],  # Peaks disappearing
@@ -299,86 +791,92 @@ def compare_spectra(spectra: List[RamanSpectrum], tolerance: float = 5.0) -> Dic
         'stable': []  # Peaks present throughout
     }
     
-    # Track peaks across temperatures
-    # Start with peaks from the first (coldest) spectrum
-    initial_peaks = spectra[0].get_peak_list()
+    temperatures = batch.temperatures.tolist()
+    wn = batch.peak_wavenumbers
+    rel = batch.peak_intensities
+    is_shoulder = batch.peak_is_shoulder
     
-    for spectrum_idx in range(1, len(spectra)):
-        prev_spectrum = spectra[spectrum_idx - 1]
-        curr_spectrum = spectra[spectrum_idx]
-        
-        prev_peaks = prev_spectrum.get_peak_list()
-        curr_peaks = curr_spectrum.get_peak_list()
-        
-        # Check for new peaks appearing
-        for curr_peak in curr_peaks:
-            match = match_peak(curr_peak['wavenumber'], prev_peaks, tolerance)
-            if match is None:
-                changes['appearing'].append({
-                    'wavenumber': curr_peak['wavenumber'],
-                    'temperature': curr_spectrum.temperature,
-                    'intensity': curr_peak['relative_intensity'],
-                    'from_temp': prev_spectrum.temperature,
-                    'to_temp': curr_spectrum.temperature,
-                    'is_shoulder': curr_peak.get('is_shoulder', False)
-                })
-        
-        # Check for peaks disappearing
-        for prev_peak in prev_peaks:
-            match = match_peak(prev_peak['wavenumber'], curr_peaks, tolerance)
-            if match is None:
-                changes['disappearing'].append({
-                    'wavenumber': prev_peak['wavenumber'],
-                    'temperature': curr_spectrum.temperature,
-                    'last_seen': prev_spectrum.temperature,
-                    'from_temp': prev_spectrum.temperature,
-                    'to_temp': curr_spectrum.temperature,
-                    'is_shoulder': prev_peak.get('is_shoulder', False)
-                })
-        
-        # Check for intensity changes and shifts in matching peaks
-        for prev_peak in prev_peaks:
-            match = match_peak(prev_peak['wavenumber'], curr_peaks, tolerance)
-            if match is not None:
-                # Calculate relative intensity change
-                intensity_change = (match['relative_intensity'] - prev_peak['relative_intensity']) / prev_peak['relative_intensity']
-                
-                # Check for significant intensity changes (>30%)
-                if intensity_change > 0.3:
-                    changes['growing'].append({
-                        'wavenumber': prev_peak['wavenumber'],
-                        'from_temp': prev_spectrum.temperature,
-                        'to_temp': curr_spectrum.temperature,
-                        'change_percent': intensity_change * 100,
-                        'prev_intensity': prev_peak['relative_intensity'],
-                        'curr_intensity': match['relative_intensity'],
-                        'is_shoulder': prev_peak.get('is_shoulder', False)
-                    })
-                elif intensity_change < -0.3:
-                    changes['diminishing'].append({
-                        'wavenumber': prev_peak['wavenumber'],
-                        'from_temp': prev_spectrum.temperature,
-                        'to_temp': curr_spectrum.temperature,
-                        'change_percent': intensity_change * 100,
-                        'prev_intensity': prev_peak['relative_intensity'],
-                        'curr_intensity': match['relative_intensity'],
-                        'is_shoulder': prev_peak.get('is_shoulder', False)
-                    })
-                
-                # Check for position shifts (>2 cm⁻¹)
-                position_shift = match['wavenumber'] - prev_peak['wavenumber']
-                if abs(position_shift) > 2.0:
-                    changes['shifting'].append({
-                        'from_wavenumber': prev_peak['wavenumber'],
-                        'to_wavenumber': match['wavenumber'],
-                        'shift': position_shift,
-                        'from_temp': prev_spectrum.temperature,
-                        'to_temp': curr_spectrum.temperature
-                    })
+    appearing, disappearing, prev_to_curr, changed, shifting = _batch_peak_changes(batch, tolerance)
+    
+    def spectrum_of(indices):
+        """Index of the spectrum each flat peak index belongs to."""
+        return (np.searchsorted(batch.peak_offsets, indices, side='right') - 1).tolist()
+    
+    # Check for new peaks appearing
+    for j, k in zip(appearing, spectrum_of(appearing)):
+        changes['appearing'].append({
+            'wavenumber': wn[j],
+            'temperature': temperatures[k],
+            'intensity': rel[j],
+            'from_temp': temperatures[k - 1],
+            'to_temp': temperatures[k],
+            'is_shoulder': is_shoulder[j]
+        })
+    
+    # Check for peaks disappearing
+    for i, k in zip(disappearing, spectrum_of(disappearing)):
+        changes['disappearing'].append({
+            'wavenumber': wn[i],
+            'temperature': temperatures[k + 1],
+            'last_seen': temperatures[k],
+            'from_temp': temperatures[k],
+            'to_temp': temperatures[k + 1],
+            'is_shoulder': is_shoulder[i]
+        })
+    
+    # Significant intensity changes (>30%) in matching peaks
+    for i, k in zip(changed, spectrum_of(changed)):
+        j = prev_to_curr[i]
+        intensity_change = (rel[j] - rel[i]) / rel[i]
+        category = 'growing' if intensity_change > 0.3 else 'diminishing'
+        changes[category].append({
+            'wavenumber': wn[i],
+            'from_temp': temperatures[k],
+            'to_temp': temperatures[k + 1],
+            'change_percent': intensity_change * 100,
+            'prev_intensity': rel[i],
+            'curr_intensity': rel[j],
+            'is_shoulder': is_shoulder[i]
+        })
+    
+    # Position shifts (>2 cm⁻¹) in matching peaks
+    for i, k in zip(shifting, spectrum_of(shifting)):
+        j = prev_to_curr[i]
+        changes['shifting'].append({
+            'from_wavenumber': wn[i],
+            'to_wavenumber': wn[j],
+            'shift': wn[j] - wn[i],
+            'from_temp': temperatures[k],
+            'to_temp': temperatures[k + 1]
+        })
     
     return changes
 
 
+def compare_spectra(spectra: List[RamanSpectrum], tolerance: float = 5.0) -> Dict:
+    """
+    Compare multiple spectra to detect changes across temperatures.
+    
+    Note: Assumes peaks have already been detected in all spectra.
+    
+    Returns a dictionary with detected changes categorized by type.
+    """
+    return compare_batch(SpectrumBatch.from_spectra(spectra), tolerance)
+
+
+def _format_peak(wavenumber: float, is_shoulder: bool) -> str:
+    """Format a wavenumber with shoulder notation."""
+    if is_shoulder:
+        return f"{wavenumber:.0f} cm⁻¹ (sh.)"
+    return f"{wavenumber:.0f} cm⁻¹"
+
+
+def _peak_labels(changes: List[Dict]) -> List[str]:
+    """Formatted band labels for a list of change records, in the same order."""
+    return [_format_peak(change['wavenumber'], change.get('is_shoulder', False))
+            for change in changes]
+
+
 def generate_report(spectra: List[RamanSpectrum], changes: Dict, 
                    marker_bands: Optional[Dict] = None) -> str:
     """
@@ -394,6 +892,9 @@ def generate_report(spectra: List[RamanSpectrum], changes: Dict,
         Reference marker bands for solid/liquid phases
         Format: {'solid': [list of wavenumbers], 'liquid': [list of wavenumbers]}
     """
+    if marker_bands:
+        marker_bands = _sorted_marker_bands(marker_bands)
+    
     report = []
     report.append("=" * 80)
     report.append("RAMAN SPECTRAL CHANGES ANALYSIS REPORT")
@@ -403,8 +904,8 @@ def generate_report(spectra: List[RamanSpectrum], changes: Dict,
     # Summary of analyzed spectra
     report.append("ANALYZED SPECTRA:")
     for spectrum in sorted(spectra, key=lambda s: s.temperature):
-        num_peaks = len(spectrum.peaks) if spectrum.peaks is not None else 0
-        num_shoulders = np.sum(spectrum.is_shoulder) if hasattr(spectrum, 'is_shoulder') else 0
+        num_peaks = spectrum.n_peaks
+        num_shoulders = spectrum.n_shoulders
         num_main = num_peaks - num_shoulders
         
         if num_shoulders > 0:
@@ -413,23 +914,14 @@ def generate_report(spectra: List[RamanSpectrum], changes: Dict,
             report.append(f"  {spectrum.temperature:.2f} K: {num_peaks} peaks detected")
     report.append("")
     
-    # Helper function to format wavenumber with shoulder notation
-    def format_peak(change):
-        wn = change['wavenumber']
-        is_shoulder = change.get('is_shoulder', False)
-        if is_shoulder:
-            return f"{wn:.0f} cm⁻¹ (sh.)"
-        else:
-            return f"{wn:.0f} cm⁻¹"
-    
     # Appearing peaks
     if changes['appearing']:
         report.append("NEW PEAKS APPEARING:")
-        for change in sorted(changes['appearing'], key=lambda x: (x['temperature'], x['wavenumber'])):
-            formatted = format_peak(change)
+        sorted_changes = sorted(changes['appearing'], key=lambda x: (x['temperature'], x['wavenumber']))
+        for change, formatted in zip(sorted_changes, _peak_labels(sorted_changes)):
             report.append(f"  At {change['to_temp']:.2f} K: Band appears at {formatted}")
             if marker_bands:
-                phase = assign_phase(change['wavenumber'], marker_bands)
+                phase = _assign_phase_sorted(change['wavenumber'], marker_bands)
                 if phase:
                     report.append(f"    → Assigned to {phase} phase")
         report.append("")
@@ -437,11 +929,11 @@ def generate_report(spectra: List[RamanSpectrum], changes: Dict,
     # Disappearing peaks
     if changes['disappearing']:
         report.append("PEAKS DISAPPEARING:")
-        for change in sorted(changes['disappearing'], key=lambda x: (x['temperature'], x['wavenumber'])):
-            formatted = format_peak(change)
+        sorted_changes = sorted(changes['disappearing'], key=lambda x: (x['temperature'], x['wavenumber']))
+        for change, formatted in zip(sorted_changes, _peak_labels(sorted_changes)):
             report.append(f"  At {change['to_temp']:.2f} K: Band at {formatted} disappears")
             if marker_bands:
-                phase = assign_phase(change['wavenumber'], marker_bands)
+                phase = _assign_phase_sorted(change['wavenumber'], marker_bands)
                 if phase:
                     report.append(f"    → Was assigned to {phase} phase")
         report.append("")
@@ -449,8 +941,8 @@ def generate_report(spectra: List[RamanSpectrum], changes: Dict,
     # Growing peaks
     if changes['growing']:
         report.append("PEAKS GROWING IN INTENSITY:")
-        for change in sorted(changes['growing'], key=lambda x: (x['to_temp'], x['wavenumber'])):
-            formatted = format_peak(change)
+        sorted_changes = sorted(changes['growing'], key=lambda x: (x['to_temp'], x['wavenumber']))
+        for change, formatted in zip(sorted_changes, _peak_labels(sorted_changes)):
             report.append(f"  {change['from_temp']:.2f} → {change['to_temp']:.2f} K: "
                          f"Band at {formatted} grows by {change['change_percent']:.0f}%")
         report.append("")
@@ -458,8 +950,8 @@ def generate_report(spectra: List[RamanSpectrum], changes: Dict,
     # Diminishing peaks
     if changes['diminishing']:
         report.append("PEAKS DIMINISHING IN INTENSITY:")
-        for change in sorted(changes['diminishing'], key=lambda x: (x['to_temp'], x['wavenumber'])):
-            formatted = format_peak(change)
+        sorted_changes = sorted(changes['diminishing'], key=lambda x: (x['to_temp'], x['wavenumber']))
+        for change, formatted in zip(sorted_changes, _peak_labels(sorted_changes)):
             report.append(f"  {change['from_temp']:.2f} → {change['to_temp']:.2f} K: "
                          f"Band at {formatted} decreases by {change['change_percent']:.0f}%")
         report.append("")
@@ -479,6 +971,31 @@ def generate_report(spectra: List[RamanSpectrum], changes: Dict,
     return "\n".join(report)
 
 
+def _sorted_marker_bands(marker_bands: Dict) -> Dict[str, np.ndarray]:
+    """Convert marker band lists to sorted arrays, as expected by _assign_phase_sorted."""
+    return {phase: np.sort(np.asarray(bands, dtype=np.float64))
+            for phase, bands in marker_bands.items()}
+
+
+def _assign_phase_sorted(wavenumber: float, sorted_bands: Dict[str, np.ndarray],
+                         tolerance: float = 10.0) -> Optional[str]:
+    """
+    assign_phase for marker bands already converted by _sorted_marker_bands.
+    
+    generate_report sorts the markers once and assigns many wavenumbers.
+    """
+    for phase, bands in sorted_bands.items():
+        if len(bands) == 0:
+            continue
+        # Only the markers on either side of the insertion point can be closest
+        idx = np.searchsorted(bands, wavenumber)
+        below = bands[max(idx - 1, 0)]
+        above = bands[min(idx, len(bands) - 1)]
+        if min(abs(wavenumber - below), abs(above - wavenumber)) <= tolerance:
+            return phase
+    return None
+
+
 def assign_phase(wavenumber: float, marker_bands: Dict, tolerance: float = 10.0) -> Optional[str]:
     """
     Assign a wavenumber to a phase based on marker bands.
@@ -488,22 +1005,41 @@ def assign_phase(wavenumber: float, marker_bands: Dict, tolerance: float = 10.0)
     wavenumber : float
         Wavenumber to assign
     marker_bands : Dict
-        Dictionary with 'solid', 'liquid', etc. keys containing lists of marker wavenumbers
+        Dictionary with 'solid', 'liquid', etc. keys containing marker
+        wavenumbers (lists or arrays, in any order), e.g. from
+        parse_marker_bands
     tolerance : float
         Maximum distance to consider a match
     """
-    for phase, bands in marker_bands.items():
-        for marker in bands:
-            if abs(wavenumber - marker) <= tolerance:
-                return phase
-    return None
+    return _assign_phase_sorted(wavenumber, _sorted_marker_bands(marker_bands), tolerance)
+
+
+def top_k_by_intensity(peak_list: Dict[str, np.ndarray], k: int) -> np.ndarray:
+    """
+    Return indices of the k most intense peaks in peak_list, strongest first.
+    
+    Selects with np.argpartition (O(P)) and only sorts the k selected peaks,
+    instead of sorting the whole peak list by intensity.
+    """
+    intensities = np.asarray(peak_list['intensity'])
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+    
+    if k < len(intensities):
+        idx = np.argpartition(-intensities, k)[:k]
+    else:
+        idx = np.arange(len(intensities))
+    
+    return idx[np.argsort(-intensities[idx], kind='stable')]
 
 
 def plot_spectra_comparison(spectra: List[RamanSpectrum], changes: Dict, 
-                           output_file: Optional[str] = None):
+                           output_file: Optional[str] = None, label_top: int = 0):
     """
     Create a visualization of the spectra with detected changes highlighted.
     Main peaks shown as circles, shoulders shown as triangles.
+    If label_top > 0, the label_top strongest peaks of each spectrum are
+    annotated with their wavenumber.
     """
     if plt is None:
         print("Warning: matplotlib not available. Skipping plot generation.")
@@ -519,17 +1055,17 @@ def plot_spectra_comparison(spectra: List[RamanSpectrum], changes: Dict,
     offset_step = 0.3
     
     for spectrum in spectra:
-        # Normalize
-        norm_intensity = spectrum.intensity / np.max(spectrum.intensity) + offset
+        # Normalized intensity is cached on the spectrum
+        norm_intensity = spectrum.norm_intensity + offset
         ax.plot(spectrum.wavenumber, norm_intensity, label=f'{spectrum.temperature:.2f} K', linewidth=1)
         
         # Mark peaks
         if spectrum.peaks is not None:
             peak_wn = spectrum.wavenumber[spectrum.peaks]
-            peak_int = spectrum.intensity[spectrum.peaks] / np.max(spectrum.intensity) + offset
+            peak_int = norm_intensity[spectrum.peaks]
             
             # Separate main peaks and shoulders
-            if hasattr(spectrum, 'is_shoulder'):
+            if spectrum.is_shoulder is not None:
                 main_peaks_mask = ~spectrum.is_shoulder
                 shoulder_mask = spectrum.is_shoulder
                 
@@ -543,6 +1079,12 @@ def plot_spectra_comparison(spectra: List[RamanSpectrum], changes: Dict,
                            '^', markersize=4, alpha=0.7, color='orange')
             else:
                 ax.plot(peak_wn, peak_int, 'ro', markersize=4, alpha=0.6)
+            
+            # Label the strongest peaks
+            for i in top_k_by_intensity(spectrum.get_peak_list(), label_top):
+                ax.annotate(f'{peak_wn[i]:.0f}', (peak_wn[i], peak_int[i]),
+                           textcoords='offset points', xytext=(0, 4),
+                           ha='center', fontsize=7)
         
         offset += offset_step
     
@@ -581,30 +1123,44 @@ def parse_marker_bands(marker_string: str) -> Dict:
       solid: [183, 285, 326, ...]
       liquid: [252, 374, 468, ...]
     """
-    import re
-    
     marker_bands = {}
     
     # Find all phase definitions
-    phase_pattern = r'(\w+):\s*\[([\d,\s\(\)\–\-\w\.]+)\]'
-    matches = re.findall(phase_pattern, marker_string)
-    
-    for phase, bands_str in matches:
+    for phase, bands_str in _PHASE_RE.findall(marker_string):
         # Extract numbers, handling ranges like "1025-1029" or "1300 (sh.)"
-        numbers = []
         # Remove annotations like (sh.), (dublet), etc.
-        bands_str = re.sub(r'\([^)]+\)', '', bands_str)
-        # Handle ranges with – or -
-        bands_str = re.sub(r'(\d+)\s*[–\-]\s*(\d+)', r'\1', bands_str)
-        # Extract all numbers
-        for num in re.findall(r'\d+', bands_str):
-            numbers.append(float(num))
-        
-        marker_bands[phase] = numbers
+        bands_str = _ANNOT_RE.sub('', bands_str)
+        # Extract all numbers; ranges with – or - keep the lower bound
+        bands = _MARKER_RE.findall(bands_str)
+        marker_bands[phase] = list(map(float, bands))
     
     return marker_bands
 
 
+def _detect_peaks_worker(spectrum: RamanSpectrum, prominence: float, height: float,
+                         detect_shoulders: bool) -> RamanSpectrum:
+    """
+    Detect peaks in one spectrum and return it.
+    
+    Module-level so it can run in a ProcessPoolExecutor; worker processes
+    don't share memory, so the updated spectrum is returned to the caller.
+    """
+    spectrum.detect_peaks(
+        prominence=prominence,
+        height=height,
+        detect_shoulders=detect_shoulders
+    )
+    return spectrum
+
+
+def _positive_int(value: str) -> int:
+    """argparse type for options that need an integer >= 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Detect spectral changes in temperature-dependent Raman data',
@@ -636,11 +1192,19 @@ Examples:
                        help='Minimum peak height for detection (default: 0.005)')
     parser.add_argument('--no-shoulders', action='store_true',
                        help='Disable shoulder detection (faster but less complete)')
+    parser.add_argument('--float64', action='store_true',
+                       help='Keep spectra in float64 instead of float32 (for high-dynamic-range data)')
+    parser.add_argument('--label-peaks', type=int, default=0, metavar='K',
+                       help='Annotate the K strongest peaks of each spectrum in the plot (default: 0)')
+    parser.add_argument('--jobs', type=_positive_int, default=1,
+                       help='Worker processes for peak detection (default: 1 = serial; '
+                            'only worth it for many long spectra)')
     
     args = parser.parse_args()
     
     # Detect shoulders unless disabled
     detect_shoulders = not args.no_shoulders
+    dtype = np.float64 if args.float64 else np.float32
     
     # Load spectra
     spectra = []
@@ -649,7 +1213,7 @@ Examples:
         print(f"Loading {len(args.txt)} spectrum files...\n")
         for txt_file in args.txt:
             try:
-                spectrum = load_txt_spectrum(Path(txt_file))
+                spectrum = load_txt_spectrum(Path(txt_file), dtype=dtype)
                 spectra.append(spectrum)
                 print(f"  ✓ Loaded {txt_file}: {spectrum.temperature:.2f} K, "
                       f"{len(spectrum.wavenumber)} data points")
@@ -685,13 +1249,16 @@ Examples:
     # Detect changes
     print("Analyzing spectral changes...")
     
-    # Set peak detection parameters for all spectra
-    for spectrum in spectra:
-        spectrum.detect_peaks(
-            prominence=args.prominence,
-            height=args.height,
-            detect_shoulders=detect_shoulders
-        )
+    # Set peak detection parameters for all spectra; spectra are independent,
+    # so with --jobs > 1 detection runs in worker processes. Serial is the
+    # default: per-spectrum detection takes milliseconds, far less than
+    # starting a process pool and pickling the spectra.
+    detect_args = (repeat(args.prominence), repeat(args.height), repeat(detect_shoulders))
+    if args.jobs == 1:
+        spectra = list(map(_detect_peaks_worker, spectra, *detect_args))
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            spectra = list(executor.map(_detect_peaks_worker, spectra, *detect_args))
     
     changes = compare_spectra(spectra, tolerance=args.tolerance)
     
@@ -707,7 +1274,7 @@ Examples:
     
     # Generate plot if requested
     if args.plot:
-        plot_spectra_comparison(spectra, changes, args.plot)
+        plot_spectra_comparison(spectra, changes, args.plot, label_top=args.label_peaks)
     
     return 0
 
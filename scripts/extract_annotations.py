@@ -10,12 +10,22 @@ Usage:
 
 Requirements:
     pip install pillow pytesseract easyocr opencv-python numpy --break-system-packages
+    pip install tesserocr --break-system-packages  # optional, faster in-process tesseract
+    pip install google-re2 --break-system-packages  # optional, linear-time regex scanning
 """
 
 import sys
 import re
+import argparse
+import json
+import hashlib
+import functools
+from collections import OrderedDict
+import threading
 from pathlib import Path
 
+import numpy as np
+
 try:
     from PIL import Image
     import pytesseract
@@ -23,107 +33,418 @@ except ImportError:
     print("Warning: PIL or pytesseract not available. Install with: pip install pillow pytesseract --break-system-packages")
     pytesseract = None
 
+# Optional: tesserocr runs libtesseract in-process (no subprocess per image);
+# pytesseract is used when it is not installed
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# OpenCV decodes images for both OCR engines (see _load_image); PIL is the fallback
 try:
-    import easyocr
     import cv2
-    import numpy as np
+except ImportError:
+    cv2 = None
+
+try:
+    import easyocr
 except ImportError:
     print("Warning: easyocr not available. Install with: pip install easyocr opencv-python --break-system-packages")
     easyocr = None
 
+# Optional: google-re2 scans in linear time (no backtracking) on long OCR
+# dumps; the patterns below are written to compile with either engine
+try:
+    import re2 as _regex
+except ImportError:
+    _regex = re
+
+# Raman band range (cm⁻¹)
+BAND_MIN, BAND_MAX = 50, 4000
+# Raman band positions: integers 50-4000 (cm⁻¹)
+_BAND_RE = _regex.compile(r'\b([5-9]\d|[1-9]\d{2}|[1-3]\d{3}|4000)\b')
+# Temperatures like "254.15 K" or "248K"
+_TEMP_RE = _regex.compile(r'(\d{2,3}(?:\.\d{1,2})?)\s*K')
+# Room temperature: "RT" or "room temp..."
+_RT_RE = _regex.compile(r'(?i)\bRT\b|room\s+temp')
+# All three in one pattern for a single scan (see parse_all). Temperatures
+# come first, so the number in "254 K" is not also reported as a band.
+_ANNOTATION_RE = _regex.compile(
+    r'(?P<temp>\d{2,3}(?:\.\d{1,2})?)\s*K'
+    r'|(?P<rt>(?i:\bRT\b|room\s+temp))'
+    r'|(?P<band>\b(?:[5-9]\d|[1-9]\d{2}|[1-3]\d{3}|4000)\b)'
+)
+
+
+# OCR results are cached by image content: in memory for this process (the
+# most recently used _OCR_MEMORY_CACHE_SIZE results) and as JSON files on
+# disk across runs
+_OCR_CACHE_DIR = Path.home() / '.cache' / 'binary-raman' / 'ocr'
+# Bump when the format of cached results changes
+_OCR_CACHE_VERSION = 2
+_OCR_MEMORY_CACHE_SIZE = 128
+_OCR_MEMORY_CACHE = OrderedDict()
+
+
+def _hash_file(path):
+    """Return a fast content hash (BLAKE2b, 128 bit) of the file at path."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _json_default(obj):
+    """Serialize NumPy scalars/arrays found in OCR results."""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _cached_ocr(backend=None):
+    """
+    Cache an OCR function's results by the content hash of its input image.
+    
+    Unchanged images are not OCR'd again, neither within a run nor across
+    runs. Keyword arguments (OCR settings) are part of the cache key; image,
+    the already decoded pixels of image_path (see _load_image), is not.
+    backend, if given, returns the name of the library the engine will use
+    (bindings can read the same image differently); it is part of the key
+    too. Results are returned as parsed from JSON, whether they come from
+    the engine or a cache. Results of None (engine not available) are not
+    cached.
+    """
+    def decorator(engine):
+        @functools.wraps(engine)
+        def wrapper(image_path, image=None, **kwargs):
+            name = engine.__name__ if backend is None else f"{engine.__name__}-{backend()}"
+            key = f"{name}-v{_OCR_CACHE_VERSION}-{_hash_file(image_path)}"
+            if kwargs:
+                settings = json.dumps(kwargs, sort_keys=True).encode()
+                key += '-' + hashlib.blake2b(settings, digest_size=4).hexdigest()
+            if key in _OCR_MEMORY_CACHE:
+                _OCR_MEMORY_CACHE.move_to_end(key)
+                return _OCR_MEMORY_CACHE[key]
+            
+            cache_file = _OCR_CACHE_DIR / f"{key}.json"
+            try:
+                result = json.loads(cache_file.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                result = engine(image_path, image, **kwargs)
+                if result is None:
+                    return None
+                serialized = json.dumps(result, default=_json_default)
+                # Same types as a disk hit (lists, not tuples or NumPy scalars)
+                result = json.loads(serialized)
+                try:
+                    _OCR_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                    cache_file.write_text(serialized, encoding='utf-8')
+                except OSError:
+                    pass  # Cache is best effort; a read-only home is fine
+            
+            _OCR_MEMORY_CACHE[key] = result
+            if len(_OCR_MEMORY_CACHE) > _OCR_MEMORY_CACHE_SIZE:
+                _OCR_MEMORY_CACHE.popitem(last=False)
+            return result
+        
+        return wrapper
+    
+    return decorator
+
+
+def _load_image(image_path):
+    """
+    Decode an image as grayscale for the OCR engines.
+    
+    Returns a 2-D uint8 array (OpenCV), or a PIL 'L' image if OpenCV is
+    not installed. main decodes each figure once and passes the result to
+    every engine.
+    """
+    if cv2 is not None:
+        img = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            raise OSError(f"Could not read image: {image_path}")
+        return img
+    return Image.open(image_path).convert('L')
+
+
+# One tesserocr API per thread: PyTessBaseAPI is not thread-safe
+_TESS_LOCAL = threading.local()
+
+
+def _get_tess_api():
+    """Return this thread's tesserocr API, creating it on first use."""
+    api = getattr(_TESS_LOCAL, 'api', None)
+    if api is None:
+        api = _TESS_LOCAL.api = tesserocr.PyTessBaseAPI(lang='eng')
+    return api
+
+
+def _tesseract_backend():
+    """Name of the tesseract binding extract_with_pytesseract uses."""
+    return 'tesserocr' if tesserocr is not None else 'pytesseract'
 
-def extract_with_pytesseract(image_path):
-    """Extract text using pytesseract."""
-    if pytesseract is None:
+
+@_cached_ocr(backend=_tesseract_backend)
+def extract_with_pytesseract(image_path, image=None):
+    """
+    Extract text using tesseract (in-process via tesserocr if available).
+    
+    image is image_path already decoded by _load_image; it is loaded here
+    if not given.
+    """
+    if tesserocr is None and pytesseract is None:
         return None
     
-    img = Image.open(image_path)
+    img = image if image is not None else _load_image(image_path)
+    if tesserocr is not None:
+        api = _get_tess_api()
+        if isinstance(img, np.ndarray):
+            height, width = img.shape
+            api.SetImageBytes(img.tobytes(), width, height, 1, width)
+        else:
+            api.SetImage(img)
+        return api.GetUTF8Text()
+    
     text = pytesseract.image_to_string(img)
     return text
 
 
-def extract_with_easyocr(image_path):
-    """Extract text using easyocr."""
-    if easyocr is None:
-        return None
+# Lazily created easyocr.Reader, shared by all calls (see get_reader)
+_READER = None
+
+
+def get_reader():
+    """
+    Return the shared easyocr Reader, creating it on first use.
+    
+    Building a Reader loads the detection and recognition models from disk,
+    so it is done once per process instead of once per image. On GPU the
+    recognizer runs in FP16 (see _autocast_fp16); the CRAFT detector stays
+    in FP32 because its score maps go through OpenCV box post-processing,
+    which does not accept float16.
+    """
+    global _READER
+    if _READER is None:
+        import torch
+        gpu = torch.cuda.is_available()
+        _READER = easyocr.Reader(['en'], gpu=gpu, cudnn_benchmark=True)
+        if gpu:
+            _READER.recognizer.forward = _autocast_fp16(_READER.recognizer.forward)
+    return _READER
+
+
+def _autocast_fp16(forward):
+    """
+    Wrap a CUDA model's forward to run in FP16 and return FP32 outputs.
     
-    reader = easyocr.Reader(['en'])
-    result = reader.readtext(str(image_path))
+    torch.autocast casts convolutions, matmuls and LSTMs to half precision
+    (tensor cores) and keeps reductions like softmax in FP32. The output is
+    cast back so easyocr's decoding sees the dtype it expects.
+    """
+    import torch
     
+    @functools.wraps(forward)
+    def wrapper(*args, **kwargs):
+        with torch.autocast('cuda', dtype=torch.float16):
+            return forward(*args, **kwargs).float()
+    
+    return wrapper
+
+
+def _easyocr_records(result):
+    """
+    Convert easyocr (bbox, text, confidence) tuples into parallel lists.
+    
+    Returns a dict with 'text', 'confidence' and 'position' lists, entry i
+    of each describing text box i, so the texts can be joined directly.
+    """
     # Extract text and positions
-    extracted = []
-    for (bbox, text, confidence) in result:
-        extracted.append({
-            'text': text,
-            'confidence': confidence,
-            'position': bbox
-        })
+    positions, texts, confidences = zip(*result) if result else ((), (), ())
+    return {
+        'text': list(texts),
+        'confidence': list(confidences),
+        'position': list(positions),
+    }
+
+
+# easyocr detection settings for printed figure annotations: large, clean
+# digits don't need upscaling, and a smaller canvas shrinks the CRAFT input
+# (easyocr defaults: canvas_size=2560, text_threshold=0.7, low_text=0.4,
+# link_threshold=0.4). Override per call or from the command line.
+EASYOCR_DETECT_PARAMS = {
+    'mag_ratio': 1.0,
+    'canvas_size': 1280,
+    'text_threshold': 0.5,
+    'low_text': 0.3,
+    'link_threshold': 0.1,
+}
+
+
+@_cached_ocr()
+def extract_with_easyocr(image_path, image=None, **detect_params):
+    """
+    Extract text using easyocr.
+    
+    image is image_path already decoded by _load_image (loaded here if not
+    given); detect_params override EASYOCR_DETECT_PARAMS (mag_ratio,
+    canvas_size, ...).
+    """
+    if easyocr is None:
+        return None
     
-    return extracted
+    img = image if image is not None else _load_image(image_path)
+    if not isinstance(img, np.ndarray):
+        img = np.asarray(img)  # easyocr takes file paths, bytes or arrays
+    reader = get_reader()
+    result = reader.readtext(img, **{**EASYOCR_DETECT_PARAMS, **detect_params})
+    
+    return _easyocr_records(result)
 
 
 def parse_bands(text):
     """Extract Raman band positions (wavenumbers) from text."""
     # Match numbers that could be wavenumbers (typically 50-4000 cm⁻¹)
-    band_pattern = r'\b([5-9]\d|[1-9]\d{2,3})\b'
-    bands = re.findall(band_pattern, text)
-    return [int(b) for b in bands if 50 <= int(b) <= 4000]
+    # Stream matches straight into the array (no intermediate list of strings)
+    bands = np.fromiter((int(m.group(1)) for m in _BAND_RE.finditer(text)), dtype=np.int32)
+    bands = bands[(bands >= BAND_MIN) & (bands <= BAND_MAX)]
+    return bands.tolist()
 
 
 def parse_temperatures(text):
     """Extract temperatures in Kelvin from text."""
     # Match patterns like "254.15 K", "RT", "room temperature"
-    temp_pattern = r'(\d{2,3}(?:\.\d{1,2})?)\s*K'
-    temps = re.findall(temp_pattern, text)
-    
-    temperatures = [float(t) for t in temps]
+    temperatures = [float(m.group(1)) for m in _TEMP_RE.finditer(text)]
     
     # Check for RT (room temperature)
-    if re.search(r'\bRT\b|room\s+temp', text, re.IGNORECASE):
+    if _RT_RE.search(text):
         temperatures.append('RT')
     
     return temperatures
 
 
-def main(image_path):
-    """Main extraction function."""
+def parse_all(text):
+    """
+    Extract band positions and temperatures from text in a single scan.
+    
+    Returns a dict with 'bands' and 'temperatures' in the formats of
+    parse_bands and parse_temperatures. Numbers that are part of a
+    temperature are not counted as bands.
+    """
+    bands = []
+    temperatures = []
+    room_temperature = False
+    for match in _ANNOTATION_RE.finditer(text):
+        group = match.lastgroup
+        if group == 'band':
+            bands.append(int(match.group('band')))
+        elif group == 'temp':
+            temperatures.append(float(match.group('temp')))
+        else:
+            room_temperature = True
+    
+    bands = np.array(bands, dtype=np.int32)
+    bands = bands[(bands >= BAND_MIN) & (bands <= BAND_MAX)]
+    if room_temperature:
+        temperatures.append('RT')
+    
+    return {'bands': bands.tolist(), 'temperatures': temperatures}
+
+
+# An engine's result is good enough to skip the remaining engines when it
+# finds at least this many bands and a temperature
+MIN_CONFIDENT_BANDS = 3
+
+# Images whose longest side is below this (pixels) are read by tesseract
+# alone: on small annotation crops easyocr is ~3x slower for about the same
+# accuracy. 0 always allows easyocr.
+EASYOCR_MIN_SIZE = 1200
+
+
+def _image_max_side(image):
+    """Longest side in pixels of an image decoded by _load_image."""
+    return max(image.shape) if hasattr(image, 'shape') else max(image.size)
+
+
+def _pytesseract_text(image_path, image):
+    """Run tesseract and print its raw text; returns the text or None."""
+    text = extract_with_pytesseract(image_path, image)
+    if not text:
+        return None
+    
+    print("Extracted text:")
+    print(text)
+    print("\n" + "="*50 + "\n")
+    return text
+
+
+def _easyocr_text(image_path, image, **detect_params):
+    """Run easyocr and print the text elements; returns the combined text or None."""
+    ocr_results = extract_with_easyocr(image_path, image, **detect_params)
+    if not ocr_results or not ocr_results['text']:
+        return None
+    
+    print(f"\nFound {len(ocr_results['text'])} text elements:")
+    for text, confidence in zip(ocr_results['text'], ocr_results['confidence']):
+        print(f"  '{text}' (confidence: {confidence:.2f})")
+    print()
+    
+    # Combine all text
+    return ' '.join(ocr_results['text'])
+
+
+# Cheapest engine first; easyocr only runs when tesseract's result is weak
+OCR_ENGINES = (
+    ('pytesseract', _pytesseract_text),
+    ('easyocr', _easyocr_text),
+)
+
+
+def main(image_path, easyocr_params=None, force_both=False, easyocr_min_size=EASYOCR_MIN_SIZE):
+    """
+    Main extraction function.
+    
+    Engines run in OCR_ENGINES order and stop at the first confident result
+    (MIN_CONFIDENT_BANDS bands and a temperature) unless force_both is set.
+    Once another engine has produced text, easyocr is skipped for images
+    smaller than easyocr_min_size pixels (longest side).
+    """
+    # Engine-specific settings, passed as keyword arguments
+    engine_kwargs = {'easyocr': easyocr_params or {}}
     print(f"Analyzing image: {image_path}\n")
     
-    # Try pytesseract first
-    print("Attempting extraction with pytesseract...")
-    text_simple = extract_with_pytesseract(image_path)
+    # Decode once for all engines
+    image = _load_image(image_path)
     
-    if text_simple:
-        print("Extracted text:")
-        print(text_simple)
-        print("\n" + "="*50 + "\n")
-        
-        bands = parse_bands(text_simple)
-        temps = parse_temperatures(text_simple)
+    have_text = False
+    for i, (name, run_engine) in enumerate(OCR_ENGINES):
+        if i > 0:
+            print()
+        if (name == 'easyocr' and have_text and not force_both
+                and _image_max_side(image) < easyocr_min_size):
+            print(f"Skipping easyocr: image is smaller than {easyocr_min_size} px "
+                  "(see --easyocr-min-size).")
+            continue
+        print(f"Attempting extraction with {name}...")
+        text = run_engine(image_path, image, **engine_kwargs.get(name, {}))
+        if text is None:
+            print(f"{name} not available or failed.")
+            continue
         
-        print(f"Detected band positions: {bands}")
-        print(f"Detected temperatures: {temps}")
-    else:
-        print("pytesseract not available or failed.")
-    
-    # Try easyocr for better results
-    print("\nAttempting extraction with easyocr...")
-    ocr_results = extract_with_easyocr(image_path)
-    
-    if ocr_results:
-        print(f"\nFound {len(ocr_results)} text elements:")
-        for item in ocr_results:
-            print(f"  '{item['text']}' (confidence: {item['confidence']:.2f})")
+        have_text = True
+        parsed = parse_all(text)
         
-        # Combine all text
-        combined_text = ' '.join([item['text'] for item in ocr_results])
-        bands = parse_bands(combined_text)
-        temps = parse_temperatures(combined_text)
+        print(f"Detected band positions: {parsed['bands']}")
+        print(f"Detected temperatures: {parsed['temperatures']}")
         
-        print(f"\nDetected band positions: {bands}")
-        print(f"Detected temperatures: {temps}")
-    else:
-        print("easyocr not available or failed.")
+        if (not force_both and len(parsed['bands']) >= MIN_CONFIDENT_BANDS
+                and parsed['temperatures']):
+            remaining = [other for other, _ in OCR_ENGINES[i + 1:]]
+            if remaining:
+                print(f"\nConfident result from {name}; skipping {', '.join(remaining)} "
+                      "(use --force-both to run all engines).")
+            break
     
     print("\n" + "="*50)
     print("Note: Manual verification recommended.")
@@ -131,13 +452,37 @@ def main(image_path):
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python extract_annotations.py <image_path>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description='Extract band positions and temperatures from annotated Raman figures')
+    parser.add_argument('image_path', type=Path, help='Annotated spectrum image')
+    parser.add_argument('--force-both', action='store_true',
+                        help='Run every OCR engine even if the first result is confident')
+    
+    easyocr_group = parser.add_argument_group('easyocr detection (raise --mag-ratio for tiny text)')
+    easyocr_group.add_argument('--easyocr-min-size', type=int, default=EASYOCR_MIN_SIZE,
+                               help='Only run easyocr after tesseract on images whose longest side '
+                                    'is at least this many pixels; 0 = always (default: %(default)s)')
+    easyocr_group.add_argument('--mag-ratio', type=float, default=EASYOCR_DETECT_PARAMS['mag_ratio'],
+                               help='Image magnification before detection (default: %(default)s)')
+    easyocr_group.add_argument('--canvas-size', type=int, default=EASYOCR_DETECT_PARAMS['canvas_size'],
+                               help='Maximum detection image size in pixels (default: %(default)s)')
+    easyocr_group.add_argument('--text-threshold', type=float, default=EASYOCR_DETECT_PARAMS['text_threshold'],
+                               help='Text confidence threshold (default: %(default)s)')
+    easyocr_group.add_argument('--low-text', type=float, default=EASYOCR_DETECT_PARAMS['low_text'],
+                               help='Text low-bound score (default: %(default)s)')
+    easyocr_group.add_argument('--link-threshold', type=float, default=EASYOCR_DETECT_PARAMS['link_threshold'],
+                               help='Link confidence threshold (default: %(default)s)')
+    
+    args = parser.parse_args()
     
-    image_path = Path(sys.argv[1])
-    if not image_path.exists():
-        print(f"Error: Image not found: {image_path}")
+    if not args.image_path.exists():
+        print(f"Error: Image not found: {args.image_path}")
         sys.exit(1)
     
-    main(image_path)
+    main(args.image_path, easyocr_params={
+        'mag_ratio': args.mag_ratio,
+        'canvas_size': args.canvas_size,
+        'text_threshold': args.text_threshold,
+        'low_text': args.low_text,
+        'link_threshold': args.link_threshold,
+    }, force_both=args.force_both, easyocr_min_size=args.easyocr_min_size)
@@ -2,6 +2,7 @@ import sys
 import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
 import numpy as np
 
@@ -23,8 +24,189 @@ class LoadTxtSpectrumTests(unittest.TestCase):
 
             self.assertAlmostEqual(spectrum.temperature, 248.0)
             np.testing.assert_array_equal(spectrum.wavenumber, np.array([100.0, 101.0]))
+            np.testing.assert_array_equal(spectrum.intensity, np.array([0.1, 0.2], dtype=np.float32))
+            self.assertEqual(spectrum.intensity.dtype, np.float32)
+
+    def test_keeps_float64_when_requested(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            txt_path = Path(tmpdir) / "sample_248K.txt"
+            txt_path.write_text("100 0.1\n101 0.2\n")
+
+            spectrum = dsc.load_txt_spectrum(txt_path, dtype=np.float64)
+
             np.testing.assert_array_equal(spectrum.intensity, np.array([0.1, 0.2]))
 
+    def test_rejects_truncated_last_row(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name, text in (("sample_248K.txt", "100 0.1\n101 0.2\n102\n"),
+                               ("sample_248K.csv", "100,0.1\n101,0.2\n102,\n")):
+                with self.subTest(name=name):
+                    txt_path = Path(tmpdir) / name
+                    txt_path.write_text(text)
+
+                    with self.assertRaises(ValueError):
+                        dsc.load_txt_spectrum(txt_path)
+
+    def test_rejects_rows_with_wrong_field_count(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            txt_path = Path(tmpdir) / "sample_248K.txt"
+            txt_path.write_text("100 0.1\n101 0.2 102 0.3\n103\n0.4\n")
+
+            with self.assertRaises(ValueError):
+                dsc.load_txt_spectrum(txt_path)
+
+    def test_loads_npy_sidecar(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            npy_path = Path(tmpdir) / "sample_252.5K.npy"
+            np.save(npy_path, np.array([[100.0, 0.1], [101.0, 0.2], [102.0, 0.4]]))
+
+            spectrum = dsc.load_txt_spectrum(npy_path)
+
+            self.assertAlmostEqual(spectrum.temperature, 252.5)
+            np.testing.assert_array_equal(spectrum.wavenumber, np.array([100.0, 101.0, 102.0]))
+            np.testing.assert_array_equal(spectrum.intensity, np.array([0.1, 0.2, 0.4], dtype=np.float32))
+            del spectrum  # release the memory map before the directory is removed
+
+
+class RamanSpectrumTests(unittest.TestCase):
+    def test_stores_float32_by_default(self):
+        spectrum = dsc.RamanSpectrum(np.array([100.0, 101.0]), np.array([0.5, 1.0]), 200.0)
+
+        self.assertEqual(spectrum.wavenumber.dtype, np.float32)
+        self.assertEqual(spectrum.norm_intensity.dtype, np.float32)
+
+        spectrum = dsc.RamanSpectrum(np.array([100.0, 101.0]), np.array([0.5, 1.0]), 200.0,
+                                     dtype=np.float64)
+        self.assertEqual(spectrum.intensity.dtype, np.float64)
+
+    def test_accepts_lists_and_empty_arrays(self):
+        spectrum = dsc.RamanSpectrum([100.0, 101.0], [0.5, 1.0], 200.0, dtype=None)
+        np.testing.assert_array_equal(spectrum.norm_intensity, [0.5, 1.0])
+
+        empty = dsc.RamanSpectrum(np.array([]), np.array([]), 200.0)
+        self.assertEqual(empty.wavenumber.size, 0)
+
+    def test_normalization_follows_reassigned_intensity(self):
+        spectrum = dsc.RamanSpectrum(np.array([100.0, 101.0]), np.array([0.5, 1.0]), 200.0)
+        np.testing.assert_array_equal(spectrum.norm_intensity, [0.5, 1.0])
+
+        spectrum.intensity = np.array([2.0, 4.0], dtype=np.float32)
+        np.testing.assert_array_equal(spectrum.norm_intensity, [0.5, 1.0])
+        spectrum.intensity = np.array([4.0, 2.0], dtype=np.float32)
+        np.testing.assert_array_equal(spectrum.norm_intensity, [1.0, 0.5])
+
+
+class DetectPeaksTests(unittest.TestCase):
+    def test_shoulder_flags_follow_sorted_peaks(self):
+        wavenumber = np.arange(200, dtype=float)
+        intensity = (np.exp(-0.5 * ((wavenumber - 60) / 3) ** 2)
+                     + 0.8 * np.exp(-0.5 * ((wavenumber - 140) / 3) ** 2) + 0.01)
+        spectrum = dsc.RamanSpectrum(wavenumber, intensity, 200.0)
+
+        shoulders = np.array([50, 150])
+        with mock.patch.object(dsc.RamanSpectrum, "_detect_shoulders", return_value=shoulders):
+            spectrum.detect_peaks()
+
+        np.testing.assert_array_equal(spectrum.peaks, [50, 60, 140, 150])
+        np.testing.assert_array_equal(spectrum.is_shoulder, [True, False, False, True])
+
+    def test_peak_list_follows_peaks_set_by_hand(self):
+        wavenumber = np.arange(200, dtype=float)
+        intensity = (np.exp(-0.5 * ((wavenumber - 60) / 3) ** 2)
+                     + 0.8 * np.exp(-0.5 * ((wavenumber - 140) / 3) ** 2) + 0.01)
+        spectrum = dsc.RamanSpectrum(wavenumber, intensity, 200.0)
+        np.testing.assert_array_equal(spectrum.get_peak_list()["wavenumber"], [60.0, 140.0])
+
+        spectrum.peaks = np.array([60])
+        spectrum.is_shoulder = np.array([False])
+
+        np.testing.assert_array_equal(spectrum.get_peak_list()["wavenumber"], [60.0])
+        np.testing.assert_array_equal(spectrum.get_peak_list()["is_shoulder"], [False])
+
+    def test_feature_counts_follow_peaks(self):
+        spectrum = dsc.RamanSpectrum(np.arange(200, dtype=float), np.ones(200), 200.0)
+        self.assertEqual((spectrum.n_peaks, spectrum.n_shoulders), (0, 0))
+
+        spectrum.peaks = np.array([50, 60, 140])
+        spectrum.is_shoulder = np.array([True, False, False])
+        self.assertEqual((spectrum.n_peaks, spectrum.n_shoulders), (3, 1))
+
+        spectrum.peaks = np.array([60])
+        spectrum.is_shoulder = np.array([False])
+        self.assertEqual((spectrum.n_peaks, spectrum.n_shoulders), (1, 0))
+
+
+@unittest.skipIf(dsc.njit is None, "numba not installed")
+class NumbaKernelTests(unittest.TestCase):
+    """The compiled kernels must agree with the NumPy fallbacks."""
+
+    def _random_spectrum(self, seed, temperature=200.0):
+        rng = np.random.default_rng(seed)
+        wavenumber = np.linspace(100.0, 1800.0, 1500)
+        intensity = np.full_like(wavenumber, 0.05)
+        for center in rng.uniform(150.0, 1750.0, 30):
+            intensity += rng.uniform(0.1, 1.0) * np.exp(
+                -0.5 * ((wavenumber - center) / rng.uniform(2.0, 8.0)) ** 2)
+        intensity += rng.normal(0.0, 0.005, wavenumber.size)
+        return dsc.RamanSpectrum(wavenumber, intensity, temperature)
+
+    def test_shoulder_scan_matches_fallback(self):
+        for seed in range(5):
+            spectrum = self._random_spectrum(seed)
+            smoothed = dsc._smooth_sigma1(spectrum.norm_intensity)
+            peaks, properties = dsc.find_peaks(smoothed, prominence=0.005, width=2,
+                                               height=0.005, distance=3)
+
+            compiled = spectrum._detect_shoulders(smoothed, peaks, properties)
+            with mock.patch.object(dsc, "njit", None):
+                fallback = spectrum._detect_shoulders(smoothed, peaks, properties)
+
+            np.testing.assert_array_equal(np.sort(compiled), fallback)
+
+    def test_match_peaks_matches_fallback(self):
+        for seed in range(5):
+            spectra = [self._random_spectrum(seed * 10 + k, temperature=100.0 + k) for k in range(2)]
+            for spectrum in spectra:
+                spectrum.detect_peaks()
+            prev, curr = (spectrum.get_peak_list() for spectrum in spectra)
+            args = (prev["wavenumber"], curr["wavenumber"],
+                    prev["relative_intensity"], curr["relative_intensity"], 5.0)
+
+            compiled = dsc._match_peaks(*args)
+            with mock.patch.object(dsc, "njit", None):
+                fallback = dsc._peak_changes(*args)
+
+            for compiled_indices, fallback_indices in zip(compiled, fallback):
+                np.testing.assert_array_equal(compiled_indices, fallback_indices)
+
+    def test_zero_prev_intensity_matches_fallback(self):
+        args = (np.array([100.0, 200.0]), np.array([100.0, 200.0]),
+                np.array([0.0, 1.0]), np.array([0.0, 1.0]), 5.0)
+        zero_to_peak = args[:3] + (np.array([0.5, 1.0]), 5.0)
+
+        for case in (args, zero_to_peak):
+            compiled = dsc._match_peaks(*case)
+            with mock.patch.object(dsc, "njit", None), np.errstate(divide="ignore", invalid="ignore"):
+                fallback = dsc._peak_changes(*case)
+
+            for compiled_indices, fallback_indices in zip(compiled, fallback):
+                np.testing.assert_array_equal(compiled_indices, fallback_indices)
+
+            batch = dsc._match_batch(np.concatenate(case[:2]), np.concatenate(case[2:4]),
+                                     np.array([0, 2, 4]), 5.0)
+            np.testing.assert_array_equal(batch[3], fallback[3])
+
+    def test_batch_comparison_matches_fallback(self):
+        spectra = [self._random_spectrum(seed, temperature=100.0 + seed) for seed in range(4)]
+        for spectrum in spectra:
+            spectrum.detect_peaks()
+
+        compiled = dsc.compare_spectra(spectra)
+        with mock.patch.object(dsc, "njit", None):
+            fallback = dsc.compare_spectra(spectra)
+
+        self.assertEqual(compiled, fallback)
+
 
 class MarkerBandParsingTests(unittest.TestCase):
     def test_parses_numbers_and_ranges_with_annotations(self):
@@ -38,6 +220,21 @@ class MarkerBandParsingTests(unittest.TestCase):
         self.assertEqual(result["liquid"], [252.0, 374.0, 468.0])
 
 
+class AssignPhaseTests(unittest.TestCase):
+    def test_accepts_unsorted_marker_lists(self):
+        marker_bands = {"solid": [1300.0, 1005.0, 200.0], "liquid": [252.0, 374.0]}
+
+        self.assertEqual(dsc.assign_phase(1000.0, marker_bands), "solid")
+        self.assertEqual(dsc.assign_phase(380.0, marker_bands), "liquid")
+        self.assertIsNone(dsc.assign_phase(700.0, marker_bands))
+
+    def test_accepts_unsorted_marker_arrays(self):
+        marker_bands = {"solid": np.array([1300.0, 1005.0, 200.0]), "liquid": np.array([374.0, 252.0])}
+
+        self.assertEqual(dsc.assign_phase(1000.0, marker_bands), "solid")
+        self.assertEqual(dsc.assign_phase(250.0, marker_bands), "liquid")
+
+
 class CompareSpectraTests(unittest.TestCase):
     def _make_spectrum(self, wavenumbers, intensities, peaks, temperature):
         spectrum = dsc.RamanSpectrum(
@@ -95,6 +292,19 @@ class CompareSpectraTests(unittest.TestCase):
         self.assertAlmostEqual(shifting["to_wavenumber"], 203.0)
         self.assertAlmostEqual(shifting["shift"], 3.0)
 
+    def test_batch_packs_peaks_by_temperature(self):
+        spec_hot = self._make_spectrum([100, 200, 300], [0.2, 1.0, 0.5], [1, 2], 300.0)
+        spec_cold = self._make_spectrum([100, 200, 300, 400], [1.0, 0.1, 0.1, 0.1], [0], 100.0)
+
+        batch = dsc.SpectrumBatch.from_spectra([spec_hot, spec_cold])
+
+        np.testing.assert_array_equal(batch.temperatures, [100.0, 300.0])
+        np.testing.assert_array_equal(batch.n_points, [4, 3])
+        self.assertTrue(np.isnan(batch.wavenumbers[1, 3]))
+        np.testing.assert_array_equal(batch.peak_offsets, [0, 1, 3])
+        np.testing.assert_allclose(batch.peak_wavenumbers[batch.peak_slice(1)], [200.0, 300.0])
+        np.testing.assert_allclose(batch.peak_intensities[batch.peak_slice(1)], [1.0, 0.5])
+
 
 if __name__ == "__main__":
     unittest.main()
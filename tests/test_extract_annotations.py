@@ -0,0 +1,224 @@
+import contextlib
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+# Allow importing the OCR script directly from scripts/
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+with contextlib.redirect_stdout(io.StringIO()):  # missing-OCR-engine warnings
+    import extract_annotations as ea  # noqa: E402
+
+
+class ParseAllTests(unittest.TestCase):
+    def test_temperature_numbers_are_not_bands(self):
+        result = ea.parse_all("RT 254.15 K 248K bands 49 1580 4000 4001")
+
+        self.assertEqual(result["bands"], [1580, 4000])
+        self.assertEqual(result["temperatures"], [254.15, 248.0, "RT"])
+
+
+class EngineSelectionTests(unittest.TestCase):
+    def _run_main(self, tesseract_text, max_side=2000, **kwargs):
+        calls = []
+
+        def fake_tesseract(image_path, image=None):
+            calls.append("pytesseract")
+            return tesseract_text
+
+        def fake_easyocr(image_path, image=None, **detect_params):
+            calls.append(("easyocr", detect_params))
+            return {"text": ["1580"], "confidence": [0.9], "position": [None]}
+
+        with mock.patch.object(ea, "extract_with_pytesseract", fake_tesseract), \
+                mock.patch.object(ea, "extract_with_easyocr", fake_easyocr), \
+                mock.patch.object(ea, "_load_image", return_value=np.zeros((10, max_side), np.uint8)), \
+                contextlib.redirect_stdout(io.StringIO()):
+            ea.main("figure.png", **kwargs)
+        return calls
+
+    def test_stops_after_confident_tesseract_result(self):
+        calls = self._run_main("254 K 604 1281 1580")
+
+        self.assertEqual(calls, ["pytesseract"])
+
+    def test_falls_back_to_easyocr_with_its_settings(self):
+        calls = self._run_main("1580", easyocr_params={"canvas_size": 640})
+
+        self.assertEqual(calls, ["pytesseract", ("easyocr", {"canvas_size": 640})])
+
+    def test_force_both_runs_every_engine(self):
+        calls = self._run_main("254 K 604 1281 1580", force_both=True)
+
+        self.assertEqual(calls, ["pytesseract", ("easyocr", {})])
+
+    def test_skips_easyocr_on_small_images(self):
+        self.assertEqual(self._run_main("1580", max_side=300), ["pytesseract"])
+        self.assertEqual(self._run_main("1580", max_side=300, easyocr_min_size=0),
+                         ["pytesseract", ("easyocr", {})])
+
+    def test_decodes_the_image_once_for_all_engines(self):
+        image = np.zeros((10, 2000), np.uint8)
+        received = []
+
+        def fake_engine(image_path, image=None, **kwargs):
+            received.append(image)
+
+        with mock.patch.object(ea, "extract_with_pytesseract", fake_engine), \
+                mock.patch.object(ea, "extract_with_easyocr", fake_engine), \
+                mock.patch.object(ea, "_load_image", return_value=image) as load_image, \
+                contextlib.redirect_stdout(io.StringIO()):
+            ea.main("figure.png", force_both=True)
+
+        load_image.assert_called_once_with("figure.png")
+        self.assertEqual(len(received), 2)
+        self.assertTrue(all(arg is image for arg in received))
+
+    def test_small_images_still_use_easyocr_without_tesseract_text(self):
+        calls = self._run_main(None, max_side=300)
+
+        self.assertEqual(calls, ["pytesseract", ("easyocr", {})])
+
+
+class EasyocrReaderTests(unittest.TestCase):
+    def _get_reader(self, cuda):
+        entered = []
+
+        @contextlib.contextmanager
+        def autocast(device_type, dtype):
+            entered.append((device_type, dtype))
+            yield
+
+        fake_torch = mock.Mock(float16="float16", autocast=autocast)
+        fake_torch.cuda.is_available.return_value = cuda
+        fake_easyocr = mock.Mock()
+        reader = fake_easyocr.Reader.return_value
+        detector_forward = reader.detector.forward
+        recognizer_forward = reader.recognizer.forward
+
+        with mock.patch.dict(sys.modules, {"torch": fake_torch}), \
+                mock.patch.object(ea, "easyocr", fake_easyocr), \
+                mock.patch.object(ea, "_READER", None):
+            self.assertIs(ea.get_reader(), reader)
+            output = reader.recognizer.forward("batch")
+
+        self.assertIs(reader.detector.forward, detector_forward)
+        recognizer_forward.assert_called_once_with("batch")
+        return fake_easyocr.Reader, entered, output, recognizer_forward.return_value
+
+    def test_only_the_recognizer_runs_in_fp16_on_gpu(self):
+        reader_class, entered, output, raw_output = self._get_reader(cuda=True)
+
+        reader_class.assert_called_once_with(["en"], gpu=True, cudnn_benchmark=True)
+        self.assertEqual(entered, [("cuda", "float16")])
+        self.assertIs(output, raw_output.float.return_value)
+
+    def test_cpu_reader_runs_in_fp32(self):
+        reader_class, entered, output, raw_output = self._get_reader(cuda=False)
+
+        reader_class.assert_called_once_with(["en"], gpu=False, cudnn_benchmark=True)
+        self.assertEqual(entered, [])
+        self.assertIs(output, raw_output)
+
+
+class OcrCacheTests(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmp = Path(tmpdir.name)
+        self.image = self.tmp / "figure.png"
+        self.image.write_bytes(b"fake image bytes")
+
+        patches = (mock.patch.object(ea, "_OCR_CACHE_DIR", self.tmp / "cache"),
+                   mock.patch.dict(ea._OCR_MEMORY_CACHE, clear=True))
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.calls = []
+
+        @ea._cached_ocr()
+        def fake_engine(image_path, image=None, **kwargs):
+            self.calls.append(kwargs)
+            return f"text {len(self.calls)}"
+
+        self.engine = fake_engine
+
+    def test_reuses_result_from_disk(self):
+        self.assertEqual(self.engine(self.image), "text 1")
+        ea._OCR_MEMORY_CACHE.clear()
+
+        self.assertEqual(self.engine(self.image), "text 1")
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(len(list((self.tmp / "cache").glob("fake_engine-*.json"))), 1)
+
+    def test_key_depends_on_content_and_settings(self):
+        self.engine(self.image)
+        self.engine(self.image, canvas_size=640)
+        self.image.write_bytes(b"other image bytes")
+        self.engine(self.image)
+
+        self.assertEqual(self.calls, [{}, {"canvas_size": 640}, {}])
+
+    def test_does_not_cache_missing_engine(self):
+        @ea._cached_ocr()
+        def unavailable(image_path, image=None):
+            return None
+
+        self.assertIsNone(unavailable(self.image))
+        self.assertFalse((self.tmp / "cache").exists())
+
+    def test_key_depends_on_backend(self):
+        backend = mock.Mock(return_value="tesserocr")
+
+        @ea._cached_ocr(backend=backend)
+        def engine(image_path, image=None):
+            self.calls.append(backend.return_value)
+            return self.calls[-1]
+
+        self.assertEqual(engine(self.image), "tesserocr")
+        backend.return_value = "pytesseract"
+        self.assertEqual(engine(self.image), "pytesseract")
+        self.assertEqual(engine(self.image), "pytesseract")
+        self.assertEqual(self.calls, ["tesserocr", "pytesseract"])
+
+    def test_memory_and_disk_hits_return_json_types(self):
+        @ea._cached_ocr()
+        def engine(image_path, image=None):
+            return {"text": ("604",), "confidence": (np.float64(0.5),), "position": [[(np.int32(1), 2)]]}
+
+        first = engine(self.image)
+        from_memory = engine(self.image)
+        ea._OCR_MEMORY_CACHE.clear()
+        from_disk = engine(self.image)
+
+        expected = {"text": ["604"], "confidence": [0.5], "position": [[[1, 2]]]}
+        self.assertEqual(first, expected)
+        self.assertEqual(from_memory, expected)
+        self.assertEqual(from_disk, expected)
+        self.assertIs(type(first["confidence"][0]), float)
+
+    def test_memory_cache_keeps_most_recently_used(self):
+        images = [self.tmp / f"figure{i}.png" for i in range(3)]
+        for i, image in enumerate(images):
+            image.write_bytes(f"image {i}".encode())
+
+        with mock.patch.object(ea, "_OCR_MEMORY_CACHE_SIZE", 2):
+            self.engine(images[0])
+            self.engine(images[1])
+            self.engine(images[0])
+            self.engine(images[2])
+
+        self.assertEqual(len(ea._OCR_MEMORY_CACHE), 2)
+        self.assertFalse(any(key.endswith(ea._hash_file(images[1])) for key in ea._OCR_MEMORY_CACHE))
+
+
+if __name__ == "__main__":
+    unittest.main()